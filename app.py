@@ -1,17 +1,25 @@
 from flask import (
     Flask, render_template, request, url_for, flash, redirect,
-    send_from_directory, send_file, session, make_response, Response, abort, jsonify
+    send_from_directory, session, make_response, Response, jsonify, g
 )
+from flask.json.provider import DefaultJSONProvider
 from flask_babel import Babel, _
-import os, requests, logging, re, secrets, unicodedata
+import os, requests, re, secrets, unicodedata, orjson, threading, time, hmac
 from datetime import datetime
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_sqlalchemy import SQLAlchemy
-from functools import wraps
-from sqlalchemy import inspect, text
+from functools import wraps, lru_cache
+from sqlalchemy import inspect, text, select, delete, or_, and_, func
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask_mail import Mail, Message
+from flask_compress import Compress
+from jinja2 import FileSystemBytecodeCache
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from decimal import Decimal, ROUND_HALF_UP
+from base64 import b64encode
+from types import MappingProxyType
 
 # === App unique ====================================================
 app = Flask(__name__)
@@ -36,96 +44,190 @@ def force_https_and_www():
 
 app.config["PREFERRED_URL_SCHEME"] = "https"
 
-# --- CONFIG BDD unique (Render + fallback local) -------------------
-raw_db = os.getenv("DATABASE_URL", "").strip()
-DB_URL = "sqlite:///local.db"  # fallback si pas de DATABASE_URL
-
-if raw_db:
-    url = raw_db
-    if url.startswith("postgres://"):
-        url = url.replace("postgres://", "postgresql://", 1)
-    if "sslmode=" not in url:
-        url += ("&" if "?" in url else "?") + "sslmode=require"
-    DB_URL = url
-
-app.config.update(
-    SQLALCHEMY_DATABASE_URI=DB_URL,
-    SQLALCHEMY_TRACK_MODIFICATIONS=False,
-)
-
-db = SQLAlchemy(app)
-# -------------------------------------------------------------------
-
 
 # ------------------------------------------------------------------
 # Helpers (dates, normalisation)
 # ------------------------------------------------------------------
+# clés sans accents : les jetons passent par _ACCENT_TABLE avant la recherche
 _MONTHS = {
-    "janvier":1,"février":2,"fevrier":2,"mars":3,"avril":4,"mai":5,"juin":6,
-    "juillet":7,"août":8,"aout":8,"septembre":9,"octobre":10,"novembre":11,"décembre":12,"decembre":12,
+    "janvier":1,"fevrier":2,"mars":3,"avril":4,"mai":5,"juin":6,
+    "juillet":7,"aout":8,"septembre":9,"octobre":10,"novembre":11,"decembre":12,
     "enero":1,"febrero":2,"marzo":3,"abril":4,"mayo":5,"junio":6,"julio":7,"agosto":8,"septiembre":9,"setiembre":9,"octubre":10,"noviembre":11,"diciembre":12,
     "january":1,"february":2,"march":3,"april":4,"may":5,"june":6,"july":7,"august":8,"september":9,"october":10,"november":11,"december":12,
     "jan":1,"feb":2,"mar":3,"apr":4,"may":5,"jun":6,"jul":7,"aug":8,"sep":9,"sept":9,"oct":10,"nov":11,"dec":12,
 }
+# abréviations de 3-4 lettres (« janv », « fevr. », « dic. »…) : le jeton doit être exactement
+# l'abréviation (« marketing » ne donne pas mars) ; les ambiguës (« jui » : juin/juillet) sont écartées
+_MONTHS3 = {}
+for _k, _v in _MONTHS.items():
+    for _n in (3, 4):
+        if len(_k) > _n:
+            _MONTHS3.setdefault(_k[:_n], set()).add(_v)
+_MONTHS3 = {_p: _vs.pop() for _p, _vs in _MONTHS3.items() if len(_vs) == 1}
+del _k, _v, _n
+
+_ACCENT_TABLE = str.maketrans("àâäéèêëîïôöùûüç", "aaaeeeeiioouuuc")
+
+def _month_from_token(tok: str):
+    tok = tok.translate(_ACCENT_TABLE).strip(".,")
+    return _MONTHS.get(tok) or _MONTHS3.get(tok)
+
+# regex compilées une fois à l'import
+_SPLIT_RE = re.compile(r"[ \-/]+")
+_NONDIGIT_RE = re.compile(r"\D+")
+_NONALNUM_RE = re.compile(r"[^a-z0-9]+")
+_SPACES_RE = re.compile(r"\s+")
+
+# entrées courtes et très répétées ; datetime immuable → sûr à mémoïser
+@lru_cache(maxsize=4096)
 def parse_date_str(date_str: str):
     if not date_str:
         return None
     s = date_str.strip().lower()
+    # forme dominante « 22 février 2020 » : simple split, sans regex
+    parts = s.split()
+    if len(parts) == 3 and parts[0].isdigit() and parts[2].isdigit() and parts[1].isalpha():
+        m = _month_from_token(parts[1])
+        if m:
+            d, y = int(parts[0]), int(parts[2])
+            if 0 < d <= 31 and 1900 <= y <= 2100:
+                try:
+                    return datetime(y, m, d)
+                except ValueError:
+                    return None
     try:
-        parts = re.split(r"[ \-/]+", s)
+        parts = _SPLIT_RE.split(s)
         if len(parts) < 3:
             return None
-        d = int(re.sub(r"\D+", "", parts[0]))
+        d = int(_NONDIGIT_RE.sub("", parts[0]))
         m_token = parts[1]
         if m_token.isdigit():
             m = int(m_token)
         else:
-            m = _MONTHS.get(m_token, _MONTHS.get(m_token.strip(".,"), None))
-        y = int(re.sub(r"\D+", "", parts[2]))
+            m = _month_from_token(m_token)
+        y = int(_NONDIGIT_RE.sub("", parts[2]))
         if 0 < d <= 31 and 1 <= m <= 12 and 1900 <= y <= 2100:
             return datetime(y, m, d)
     except Exception:
         return None
     return None
 
-def _sort_ts_model(c):
-    return c.created_at or parse_date_str(getattr(c, 'date_str', '')) or datetime.min
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")  # <input type="date">
 
 def _norm(s: str) -> str:
     if not s: return ""
     s = unicodedata.normalize("NFKD", s)
     s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = re.sub(r"[^a-z0-9]+", " ", s.lower()).strip()
-    return re.sub(r"\s+", " ", s)
+    s = _NONALNUM_RE.sub(" ", s.lower()).strip()
+    return _SPACES_RE.sub(" ", s)
 
 # ------------------------------------------------------------------
 # App & Base config
 # ------------------------------------------------------------------
+# JSON via orjson (jsonify, dict retourné, request.get_json) : 3–5× plus rapide que json
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+# Jinja : cache de templates illimité + bytecode sur disque (démarrage à froid des workers)
+app.jinja_options = {**app.jinja_options, "cache_size": -1, "bytecode_cache": FileSystemBytecodeCache()}
 app.secret_key = os.getenv("SECRET_KEY", "dev-secret")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
+# /healthz, /robots.txt, /sitemap.xml répondus au niveau WSGI avec des octets
+# chargés au démarrage : ni Flask, ni Babel, ni before_request, ni stat() disque
+_HEALTHZ_BODY = orjson.dumps({"status": "ok"})
+_NO_CACHE = "no-cache, no-store, must-revalidate, max-age=0"
+
+def _read_static(name: str) -> bytes:
+    with open(os.path.join(app.static_folder, name), "rb") as f:
+        return f.read()
+
+def _prebaked(body: bytes, mimetype: str, *extra_headers):
+    return body, [("Content-Type", mimetype), ("Content-Length", str(len(body))), *extra_headers]
+
+_FAST_PATHS = {
+    "/healthz": _prebaked(_HEALTHZ_BODY, "application/json"),
+    "/robots.txt": _prebaked(_read_static("robots.txt"), "text/plain; charset=utf-8", ("Cache-Control", _NO_CACHE)),
+    "/sitemap.xml": _prebaked(_read_static("sitemap.xml"), "application/xml", ("Cache-Control", _NO_CACHE)),
+}
+
+_FAST_METHODS = frozenset(("GET", "HEAD"))
+
+# posé par-dessus ProxyFix : une sonde ne traverse aucun middleware ni hook Flask
+def _fast_paths(wsgi_app):
+    def _app(environ, start_response):
+        hit = _FAST_PATHS.get(environ.get("PATH_INFO"))
+        if hit is not None and environ.get("REQUEST_METHOD") in _FAST_METHODS:
+            start_response("200 OK", hit[1])
+            return [b""] if environ["REQUEST_METHOD"] == "HEAD" else [hit[0]]
+        return wsgi_app(environ, start_response)
+    return _app
+
+app.wsgi_app = _fast_paths(app.wsgi_app)
+
+# ------------------------------------------------------------------
+# Compression gzip/br des réponses (HTML, CSS, JS, JSON)
+# ------------------------------------------------------------------
+# liste par défaut de Flask-Compress conservée (text/javascript : type des .js sur Python récent,
+# XML, texte brut) + SVG
+app.config["COMPRESS_MIMETYPES"] = [
+    "text/html", "text/css", "text/xml", "text/plain", "text/javascript",
+    "application/javascript", "application/json", "application/xml", "image/svg+xml",
+]
+app.config["COMPRESS_LEVEL"] = 5
+Compress(app)
+
 # ------------------------------------------------------------------
 # Babel (i18n)
 # ------------------------------------------------------------------
 app.config["BABEL_DEFAULT_LOCALE"] = "fr"
 app.config["BABEL_SUPPORTED_LOCALES"] = ["fr", "en", "es"]
 app.config["BABEL_TRANSLATION_DIRECTORIES"] = "translations"
-babel = Babel(app)
+# frozenset → test d'appartenance en O(1) à chaque requête
+app.config["_BABEL_LOCALE_SET"] = frozenset(app.config["BABEL_SUPPORTED_LOCALES"])
+_SUPPORTED = app.config["_BABEL_LOCALE_SET"]
+_DEFAULT_LOCALE = app.config["BABEL_DEFAULT_LOCALE"]
 
-@babel.localeselector
+# Langue résolue au premier appel puis mémorisée sur g pour la durée de la requête ;
+# get_locale() est appelé par chaque _() et chaque url_for(..., lang=get_locale())
 def get_locale():
-    lang = request.args.get("lang")
-    return lang if lang in app.config["BABEL_SUPPORTED_LOCALES"] else app.config["BABEL_DEFAULT_LOCALE"]
+    loc = g.get("locale")
+    if loc is None:
+        lang = request.args.get("lang")
+        loc = g.locale = lang if lang in _SUPPORTED else _DEFAULT_LOCALE
+    return loc
+
+# Flask-Babel 3 : sélecteur passé au constructeur ; catalogues .mo mis en cache
+# par (dossier, locale, domaine) au lieu d'être relus à chaque requête
+babel = Babel(app, locale_selector=get_locale)
 
 # 👉 expose helpers à Jinja
 app.jinja_env.globals["get_locale"] = get_locale
-def lang_url(lang_code: str):
-    args = request.args.to_dict(flat=True)
-    args["lang"] = lang_code
-    endpoint = request.endpoint or "index"
-    view_args = request.view_args or {}
-    return url_for(endpoint, **view_args, **args)
+def lang_url(lang_code: str, **extra):
+    # endpoint + arguments (hors lang) calculés une fois par requête, réutilisés pour chaque langue ;
+    # extra remplace/ajoute des arguments (ex. before=<curseur> pour la pagination)
+    base = g.get("_lang_url_base")
+    if base is None:
+        args = dict(request.view_args or {})
+        args.update((k, v) for k, v in request.args.items() if k != "lang")
+        base = g._lang_url_base = (request.endpoint or "index", args)
+    endpoint, args = base
+    if extra:
+        args = {**args, **extra}
+    # langue par défaut : pas de ?lang=fr (que _normalize_lang_fr redirigerait en 301)
+    if lang_code == _DEFAULT_LOCALE:
+        return url_for(endpoint, **args)
+    return url_for(endpoint, **args, lang=lang_code)
 app.jinja_env.globals["lang_url"] = lang_url
 
 # ✅ Normalisation d’URL: retirer ?lang=fr / lang invalide
@@ -134,7 +236,7 @@ def _normalize_lang_fr():
     if request.method not in ("GET", "HEAD"):
         return None
     lang = request.args.get("lang")
-    if lang == "fr" or (lang and lang not in ("fr","en","es")):
+    if lang == "fr" or (lang and lang not in _SUPPORTED):
         parts = urlsplit(request.url)
         qs = [(k, v) for (k, v) in parse_qsl(parts.query, keep_blank_values=True) if k.lower() != "lang"]
         new_query = urlencode(qs, doseq=True)
@@ -165,6 +267,16 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
     "pool_recycle": 1800,
 }
+if DB_URL.startswith("postgresql"):
+    # pool dimensionné + LIFO (connexions chaudes réutilisées) ; sans objet pour SQLite.
+    # recycle court : Render coupe les connexions inactives côté serveur
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=30,
+        pool_recycle=300,
+        pool_use_lifo=True,
+    )
 db = SQLAlchemy(app)
 
 # Models
@@ -176,7 +288,17 @@ class Comment(db.Model):
     rating = db.Column(db.Float, default=5.0)
     date_str = db.Column(db.String(120), default="")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # date seule, formatée à l'affichage selon la langue (date_str = anciennes lignes)
+    created_date = db.Column(db.Date, default=lambda: datetime.utcnow().date())
     message = db.Column(db.Text, nullable=False)
+    # sert ORDER BY created_at DESC NULLS LAST, id DESC (page d'accueil + curseur) ; simple index
+    # d'ordre, pas couvrant : select(Comment) lit aussi message / created_date.
+    # Postgres : NULLS LAST explicite (DESC seul y met les NULL en tête) ;
+    # SQLite : pas de NULLS dans CREATE INDEX, mais DESC y range déjà les NULL en dernier
+    __table_args__ = (
+        db.Index("ix_comments_created_nl", created_at.desc().nullslast(), id.desc()).ddl_if(dialect="postgresql"),
+        db.Index("ix_comments_created_desc", created_at.desc(), id.desc()).ddl_if(dialect="sqlite"),
+    )
 
 class CommentTranslation(db.Model):
     __tablename__="comment_translation"
@@ -216,25 +338,81 @@ class Reservation(db.Model):
     tour_slug = db.Column(db.String(80), default="")
     message = db.Column(db.Text, default="")
     language = db.Column(db.String(8), default="")
-    paypal_capture_id = db.Column(db.String(80), default="")
-
-with app.app_context():
-    db.create_all()
-    # auto-migrate douce
-    insp = inspect(db.engine)
+    # index non unique : d'anciennes lignes peuvent avoir un capture_id vide
+    paypal_capture_id = db.Column(db.String(80), default="", index=True)
+    __table_args__ = (db.Index("ix_resa_tour_date", "tour_slug", "date_str"),)
+
+# Création des tables + auto-migrate douce : une fois par déploiement (`flask init-db`
+# ou hook on_starting de gunicorn), plus à chaque import / worker
+def init_db():
+    with app.app_context():
+        db.create_all()
+        # auto-migrate douce
+        insp = inspect(db.engine)
+        try:
+            cols = [c["name"] for c in insp.get_columns("reservations")]
+            with db.engine.begin() as con:
+                if "phone" not in cols:
+                    con.execute(text("ALTER TABLE reservations ADD COLUMN phone VARCHAR(40)"))
+                if "persons" not in cols:
+                    con.execute(text("ALTER TABLE reservations ADD COLUMN persons INTEGER DEFAULT 1"))
+                if "country" not in cols:
+                    con.execute(text("ALTER TABLE reservations ADD COLUMN country VARCHAR(120)"))
+                if "paypal_capture_id" not in cols:
+                    con.execute(text("ALTER TABLE reservations ADD COLUMN paypal_capture_id VARCHAR(80)"))
+                if db.engine.dialect.name == "postgresql":
+                    # remplacé par ix_comments_created_nl (NULLS LAST), créé juste après
+                    con.execute(text("DROP INDEX IF EXISTS ix_comments_created_desc"))
+                for ix in (*Reservation.__table__.indexes, *Comment.__table__.indexes):
+                    ix.create(con, checkfirst=True)
+        except Exception as e:
+            app.logger.warning("auto_migrate_reservations_failed: %s", e)
+        try:
+            cols = [c["name"] for c in insp.get_columns("comments")]
+            if "created_date" not in cols:
+                day = "DATE(created_at)" if db.engine.dialect.name == "sqlite" else "CAST(created_at AS DATE)"
+                with db.engine.begin() as con:
+                    con.execute(text("ALTER TABLE comments ADD COLUMN created_date DATE"))
+                    con.execute(text(f"UPDATE comments SET created_date = {day} WHERE created_at IS NOT NULL"))
+            # anciennes lignes sans created_at : dérivé de date_str une fois → tri 100 % en base
+            with db.engine.begin() as con:
+                rows = con.execute(text(
+                    "SELECT id, date_str FROM comments WHERE created_at IS NULL AND date_str <> ''")).all()
+                for cid, ds in rows:
+                    dt = parse_date_str(ds)
+                    if dt:
+                        con.execute(text("UPDATE comments SET created_at = :dt, created_date = :d WHERE id = :id"),
+                                    {"dt": dt, "d": dt.date(), "id": cid})
+        except Exception as e:
+            app.logger.warning("auto_migrate_comments_failed: %s", e)
+
+@app.cli.command("init-db")
+def init_db_command():
+    init_db()
+
+# Contrôle léger du schéma (une requête d'introspection) : les colonnes requises par le code
+# sont-elles là ? Sinon init_db() (idempotent) — un démarrage qui a raté le hook gunicorn
+# (`-c` autre fichier, autre serveur WSGI) ne doit pas finir en 500 « column does not exist ».
+def _schema_behind() -> bool:
+    with app.app_context():
+        insp = inspect(db.engine)
+        if not insp.has_table("comments") or not insp.has_table("reservations"):
+            return True
+        comment_cols = {c["name"] for c in insp.get_columns("comments")}
+        resa_cols = {c["name"] for c in insp.get_columns("reservations")}
+        return "created_date" not in comment_cols or "paypal_capture_id" not in resa_cols
+
+# SQLite local (python app.py / flask run) : pas d'étape de déploiement → à l'import.
+# DB_AUTO_CREATE=1 force ce comportement (plateforme sans gunicorn.conf.py ni `flask init-db`)
+if DB_URL.startswith("sqlite") or os.getenv("DB_AUTO_CREATE") == "1":
+    init_db()
+else:
     try:
-        cols = [c["name"] for c in insp.get_columns("reservations")]
-        with db.engine.begin() as con:
-            if "phone" not in cols:
-                con.execute(text("ALTER TABLE reservations ADD COLUMN phone VARCHAR(40)"))
-            if "persons" not in cols:
-                con.execute(text("ALTER TABLE reservations ADD COLUMN persons INTEGER DEFAULT 1"))
-            if "country" not in cols:
-                con.execute(text("ALTER TABLE reservations ADD COLUMN country VARCHAR(120)"))
-            if "paypal_capture_id" not in cols:
-                con.execute(text("ALTER TABLE reservations ADD COLUMN paypal_capture_id VARCHAR(80)"))
+        if _schema_behind():
+            app.logger.warning("schema_behind: init_db() lancé à l'import")
+            init_db()
     except Exception as e:
-        app.logger.warning("auto_migrate_reservations_failed: %s", e)
+        app.logger.error("schema_check_failed: %s", e)
 
 # Endpoint santé / DB check
 @app.route("/__dbcheck")
@@ -258,20 +436,87 @@ app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_DEFAULT_SENDER", app.config[
 ADMIN_NOTIFY_EMAIL = os.getenv("ADMIN_NOTIFY_EMAIL", app.config["MAIL_DEFAULT_SENDER"] or app.config["MAIL_USERNAME"] or "")
 mail = Mail(app)
 
+# ------------------------------------------------------------------
+# Avis : pagination keyset + cache mémoire (TTL court, page d'accueil seulement), vidé à chaque écriture
+# ------------------------------------------------------------------
+_COMMENTS_CACHE = {}  # clé → (expiration monotonic, liste)
+_COMMENTS_TTL = 30  # s — borne la fraîcheur entre workers
+COMMENTS_PAGE_SIZE = max(1, int(os.getenv("HOMEPAGE_COMMENTS", "20")))  # taille de page de la page d'accueil
+
+def _cached_comments(key: str, loader):
+    hit = _COMMENTS_CACHE.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+    items = loader()
+    _COMMENTS_CACHE[key] = (time.monotonic() + _COMMENTS_TTL, items)
+    return items
+
+def _invalidate_comments():
+    _COMMENTS_CACHE.clear()
+
+def _all_comments_sorted():
+    # tri en base : les 1000 plus récents (et non 1000 lignes quelconques triées ensuite en Python).
+    # Seules les colonnes affichées par l'admin ; message tronqué côté SQL (121 car. suffisent à l'extrait)
+    stmt = (select(Comment.id, Comment.name, Comment.country, Comment.rating, Comment.created_at,
+                   func.substr(Comment.message, 1, 121).label("message"))
+            .order_by(Comment.created_at.desc().nullslast(), Comment.id.desc())
+            .limit(1000))
+    return db.session.execute(stmt).all()
+
+# curseur ?before=<created_at ISO>_<id> : (created_at, id) départage les ex æquo ;
+# « null_<id> » pour les anciennes lignes sans created_at (rangées en fin de liste)
+def _comment_cursor(c):
+    return f"{c.created_at.isoformat() if c.created_at else 'null'}_{c.id}"
+
+def _parse_comment_cursor(raw: str):
+    try:
+        ts, cid = raw.rsplit("_", 1)
+        return (None if ts == "null" else datetime.fromisoformat(ts)), int(cid)
+    except Exception:
+        return None
+
+def _comments_page(before=None):
+    # ORDER BY created_at DESC NULLS LAST, id DESC LIMIT n : parcours d'index, pas de tri complet
+    # (NULLS LAST explicite : même ordre sur Postgres et SQLite, comme l'admin)
+    stmt = (select(Comment)
+            .order_by(Comment.created_at.desc().nullslast(), Comment.id.desc())
+            .limit(COMMENTS_PAGE_SIZE))
+    if before:
+        ts, cid = before
+        if ts is None:
+            stmt = stmt.where(Comment.created_at.is_(None), Comment.id < cid)
+        else:
+            stmt = stmt.where(or_(Comment.created_at < ts,
+                                  and_(Comment.created_at == ts, Comment.id < cid),
+                                  Comment.created_at.is_(None)))
+    return db.session.execute(stmt).scalars().all()
+
 # ------------------------------------------------------------------
 # Admin minimal
 # ------------------------------------------------------------------
 ADMIN_USER = os.getenv("ADMIN_USER","admin")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+# présence du gabarit optionnel vérifiée une fois (pas de stat() à chaque affichage du login)
+_HAS_ADMIN_LOGIN_TMPL = os.path.exists(os.path.join(app.root_path, "templates", "admin_login.html"))
 
 def admin_required(fn):
     @wraps(fn)
     def _wrap(*args, **kwargs):
         if session.get("is_admin"):
             return fn(*args, **kwargs)
-        return redirect(url_for("admin_login", next=request.url))
+        # chemin relatif (pas request.url) : seul format accepté par _safe_next
+        return redirect(url_for("admin_login", next=request.full_path.rstrip("?")))
     return _wrap
 
+def _safe_next() -> str:
+    # ?next= limité à un chemin relatif de ce site (pas de schéma / hôte, ni « // » ou « /\ »)
+    nxt = request.args.get("next") or ""
+    parts = urlsplit(nxt)
+    if (not nxt.startswith("/") or nxt.startswith("//") or "\\" in nxt
+            or parts.scheme or parts.netloc):
+        return url_for("admin_home")
+    return nxt
+
 def _inline_html(title, body):
     return f"""<!doctype html>
 <html lang="fr"><meta charset="utf-8"><title>{title}</title>
@@ -291,14 +536,20 @@ details summary{{cursor:pointer}}
 
 @app.route("/admin/login", methods=["GET","POST"])
 def admin_login():
+    # déjà connecté → pas de formulaire
+    if session.get("is_admin"):
+        return redirect(_safe_next())
     if request.method == "POST":
         user = (request.form.get("user") or "").strip()
         pw = request.form.get("password") or ""
-        if ADMIN_PASSWORD and user == ADMIN_USER and pw == ADMIN_PASSWORD:
+        # comparaison à temps constant (les deux, sans court-circuit)
+        user_ok = hmac.compare_digest(user.encode(), ADMIN_USER.encode())
+        pw_ok = hmac.compare_digest(pw.encode(), (ADMIN_PASSWORD or "").encode())
+        if ADMIN_PASSWORD and user_ok and pw_ok:
             session["is_admin"] = True
-            return redirect(request.args.get("next") or url_for("admin_home"))
+            return redirect(_safe_next())
         flash(_("Identifiants invalides"), "error")
-    if os.path.exists(os.path.join(app.root_path, "templates", "admin_login.html")):
+    if _HAS_ADMIN_LOGIN_TMPL:
         return render_template("admin_login.html")
     body = """
       <h1>Connexion admin</h1>
@@ -324,10 +575,10 @@ def _ensure_tables():
     try:
         with app.app_context():
             insp = inspect(db.engine)
-            needed = ["comments","comment_translation","transfers","reservations"]
-            for t in needed:
-                if not insp.has_table(t):
-                    db.create_all()
+            needed = ("comments","comment_translation","transfers","reservations")
+            # s'arrête à la première table manquante ; create_all() une seule fois
+            if not all(insp.has_table(t) for t in needed):
+                db.create_all()
             cols = [c["name"] for c in insp.get_columns("reservations")]
             with db.engine.begin() as con:
                 if "phone" not in cols:
@@ -391,8 +642,8 @@ def _csrf_check(tok: str) -> bool:
 @app.get("/admin/comments")
 @admin_required
 def admin_comments():
-    items = Comment.query.limit(1000).all()
-    items.sort(key=lambda c: (_sort_ts_model(c), c.id), reverse=True)
+    # requête directe : le cache TTL est par processus, un avis supprimé resterait visible sur les autres workers
+    items = _all_comments_sorted()
     csrf = _csrf_get()
     rows = []
     for c in items:
@@ -437,9 +688,11 @@ def admin_delete_comment(comment_id: int):
         flash(_("Session expirée, réessaie."), "error")
         return redirect(url_for("admin_comments"))
     try:
-        CommentTranslation.query.filter_by(comment_id=comment_id).delete(synchronize_session=False)
-        Comment.query.filter_by(id=comment_id).delete(synchronize_session=False)
+        # DELETE Core (sans la machinerie Query ORM), une seule transaction / un seul commit
+        db.session.execute(delete(CommentTranslation).where(CommentTranslation.comment_id == comment_id))
+        db.session.execute(delete(Comment).where(Comment.id == comment_id))
         db.session.commit()
+        _invalidate_comments()
         flash(_("Commentaire supprimé ✅"), "success")
     except Exception as e:
         db.session.rollback()
@@ -605,40 +858,48 @@ def admin_reservation_delete(reservation_id: int):
 # ------------------------------------------------------------------
 @app.route("/")
 def index():
-    comments_db = Comment.query.limit(1000).all()
-    comments_db.sort(key=lambda c: (_sort_ts_model(c), c.id), reverse=True)
-    return render_template("index.html", comments=[c for c in comments_db])
+    before = _parse_comment_cursor(request.args.get("before") or "")
+    comments = _comments_page(before) if before else _cached_comments("home", _comments_page)
+    next_cursor = _comment_cursor(comments[-1]) if len(comments) == COMMENTS_PAGE_SIZE else None
+    return render_template("index.html", comments=comments, next_cursor=next_cursor)
 
 # ------------------------------------------------------------------
 # Déduction de langue (fallback)
 # ------------------------------------------------------------------
+_EN_TOKENS = ("uk","u.k","united kingdom","england","angleterre","royaume-uni","scotland","wales","ireland","irlande","usa","united states","etats-unis","états-unis","us","canada","australia","australie","new zealand","nouvelle-zélande")
+_ES_TOKENS = ("espagne","españa","spain","colombie","colombia","mexique","méxique","mexico","argentine","argentina","pérou","peru","chili","chile","équateur","equateur","ecuador","bolivie","bolivia","uruguay","paraguay","costa rica","panama","guatemala","honduras","el salvador","nicaragua","republica dominicana","république dominicaine","dominican republic")
+
+def _infer_lang_from_text(country_text: str, email_text: str, phone_text: str) -> str:
+    # pas de cache : email / téléphone uniques par réservation (aucun gain) et données
+    # personnelles à ne pas garder en mémoire ; les textes arrivent déjà en minuscules
+    txt = " ".join([country_text, email_text, phone_text])
+    if any(t in txt for t in _EN_TOKENS):
+        return "en"
+    if any(t in txt for t in _ES_TOKENS):
+        return "es"
+    return "fr"
+
 def _infer_lang_from_request(req, country_text: str = "", email_text: str = "", phone_text: str = "") -> str:
     qlang = (req.args.get("lang") or "").lower()
-    if qlang in ("fr","en","es"):
+    if qlang in _SUPPORTED:
         return qlang
     al = (req.headers.get("Accept-Language") or "").lower()
     for code in ("fr", "en", "es"):
         if code in al:
             return code
-    txt = " ".join([(country_text or ""), (email_text or ""), (phone_text or "")]).lower()
-    en_tokens = ["uk","u.k","united kingdom","england","angleterre","royaume-uni","scotland","wales","ireland","irlande","usa","united states","etats-unis","états-unis","us","canada","australia","australie","new zealand","nouvelle-zélande"]
-    if any(t in txt for t in en_tokens):
-        return "en"
-    es_tokens = ["espagne","españa","spain","colombie","colombia","mexique","méxique","mexico","argentine","argentina","pérou","peru","chili","chile","équateur","equateur","ecuador","bolivie","bolivia","uruguay","paraguay","costa rica","panama","guatemala","honduras","el salvador","nicaragua","republica dominicana","république dominicaine","dominican republic"]
-    if any(t in txt for t in es_tokens):
-        return "es"
-    return "fr"
+    return _infer_lang_from_text((country_text or "").lower(), (email_text or "").lower(), (phone_text or "").lower())
 
 # ------------------------------------------------------------------
 # API Devis simple (USD)
 # ------------------------------------------------------------------
-PRICES_USD = {
-    "monserrate": {"rules": [(1, 1, 65),(2, 6, 55)], "max_group": 6},
-    "zipaquira":  {"rules": [(1, 1, 130),(2, 2, 125),(3, 5, 120)], "max_group": 5},
-    "finca-cafe": {"rules": [(1, 1, 140),(2, 5, 120)], "max_group": 5},
-    "chorrera":   {"rules": [(1, 1, 125),(2, 3, 115),(4, 5, 105)], "max_group": 5},
-    "candelaria": {"rules": [(1, 1, 40),(2, 3, 35),(4, 6, 33)], "max_group": 6},
-}
+# Grilles figées (MappingProxyType + tuples) : lecture seule, indexées par slug
+PRICES_USD = MappingProxyType({
+    "monserrate": MappingProxyType({"rules": ((1, 1, 65),(2, 6, 55)), "max_group": 6}),
+    "zipaquira":  MappingProxyType({"rules": ((1, 1, 130),(2, 2, 125),(3, 5, 120)), "max_group": 5}),
+    "finca-cafe": MappingProxyType({"rules": ((1, 1, 140),(2, 5, 120)), "max_group": 5}),
+    "chorrera":   MappingProxyType({"rules": ((1, 1, 125),(2, 3, 115),(4, 5, 105)), "max_group": 5}),
+    "candelaria": MappingProxyType({"rules": ((1, 1, 40),(2, 3, 35),(4, 6, 33)), "max_group": 6}),
+})
 def quote_tour_usd(slug: str, people: int):
     conf = PRICES_USD.get((slug or "").strip().lower())
     if not conf:
@@ -676,26 +937,32 @@ def api_quote():
 # ------------------------------------------------------------------
 # Réservation + mails + PayPal capture check
 # ------------------------------------------------------------------
+# Template compilé une fois ; render_template accepte l'objet Template
+# (garde les context processors : request, session, messages flash…)
+_RES_TMPL = app.jinja_env.get_template("reservation.html")
+
 @app.route("/reservation", methods=["GET","POST"])
 def reservation():
     if request.method == "GET":
         tour_qs = (request.args.get("tour") or "").strip().lower()
         if tour_qs:
             return redirect(url_for("reservation_clean", slug=tour_qs, lang=request.args.get("lang")), code=301)
-        return render_template("reservation.html")
-
-    fullname = (request.form.get("nom") or "").strip()
-    email    = (request.form.get("email") or "").strip()
-    phone    = (request.form.get("phone") or "").strip()
-    country  = (request.form.get("country") or "").strip()
-    date_str = (request.form.get("date") or "").strip()
+        return render_template(_RES_TMPL)
+
+    # Normalisation + validation complètes AVANT tout I/O (PayPal, BDD)
+    fullname = (request.form.get("nom") or "").strip()[:160]
+    email    = (request.form.get("email") or "").strip()[:160]
+    phone    = (request.form.get("phone") or "").strip()[:40]
+    country  = (request.form.get("country") or "").strip()[:120]
+    date_str = (request.form.get("date") or "").strip()[:80]
     persons  = request.form.get("persons") or "1"
-    tour     = (request.form.get("tour") or "").strip().lower()
+    tour     = (request.form.get("tour") or "").strip().lower()[:80]
     message  = (request.form.get("message") or "").strip()
-    capture_id = (request.form.get("paypal_capture_id") or "").strip()
+    capture_id = (request.form.get("paypal_capture_id") or "").strip()[:80]
+    capture_token = (request.form.get("paypal_capture_token") or "").strip()
 
     ui_lang  = (request.form.get("ui_lang") or "").lower()
-    if ui_lang in ("fr","en","es"):
+    if ui_lang in _SUPPORTED:
         lang = ui_lang
     else:
         lang = _infer_lang_from_request(request, country_text=country, email_text=email, phone_text=phone)
@@ -707,34 +974,44 @@ def reservation():
     except Exception:
         persons = 1
 
-    if not fullname or not email or not date_str or not tour:
+    # Chaque ré-affichage sur erreur renvoie form=request.form : champs saisis et surtout
+    # paypal_capture_id / _token conservés → un client qui a déjà payé peut corriger et renvoyer.
+    # PRICES_USD (MappingProxyType) sert de catalogue des tours : lookup O(1) par slug
+    if not fullname or not email or not date_str or tour not in PRICES_USD:
         flash(_("Merci de remplir nom, email, date et tour."), "error")
-        return render_template("reservation.html", tour=tour)
+        return render_template(_RES_TMPL, tour=tour, form=request.form)
 
-    if not verify_paypal_capture(capture_id):
+    if not _EMAIL_RE.match(email) or not (_DATE_RE.match(date_str) or parse_date_str(date_str)):
+        flash(_("Merci de remplir nom, email, date et tour."), "error")
+        return render_template(_RES_TMPL, tour=tour, form=request.form)
+
+    # jeton signé valide (capture serveur < 15 min) → pas d'aller-retour PayPal
+    if not (_capture_token_ok(capture_token, capture_id) or verify_paypal_capture(capture_id)):
         flash(_("Le paiement PayPal n'a pas été confirmé. Merci d'effectuer le paiement avant d'envoyer la réservation."), "error")
-        return render_template("reservation.html", tour=tour)
+        return render_template(_RES_TMPL, tour=tour, form=request.form)
 
     try:
-        r = Reservation(
-            fullname=fullname[:160],
-            email=email[:160],
-            phone=phone[:40],
-            country=country[:120],
-            date_str=date_str[:80],
+        # INSERT direct (Core) : pas de unit-of-work ORM pour une ligne connue
+        db.session.execute(Reservation.__table__.insert().values(
+            fullname=fullname,
+            email=email,
+            phone=phone,
+            country=country,
+            date_str=date_str,
             persons=persons,
-            tour_slug=tour[:80],
+            tour_slug=tour,
             message=message,
             language=lang[:8],
-            paypal_capture_id=capture_id[:80]
-        )
-        db.session.add(r)
+            paypal_capture_id=capture_id
+        ))
         db.session.commit()
+        # rend la connexion au pool avant l'envoi SMTP (lent)
+        db.session.remove()
     except Exception as e:
         app.logger.error("reservation_db_error: %s", e)
         db.session.rollback()
         flash(_("Petit souci technique, réessaie dans quelques secondes."), "error")
-        return render_template("reservation.html", tour=tour)
+        return render_template(_RES_TMPL, tour=tour, form=request.form)
 
     try:
         if app.config["MAIL_USERNAME"] and (app.config["MAIL_PASSWORD"] or app.config["MAIL_USE_SSL"] or app.config["MAIL_USE_TLS"]):
@@ -792,7 +1069,7 @@ Oh La La Tours Bogotá
             }
             subject_cli = subjects.get(lang, subjects["fr"])
             body_cli    = bodies.get(lang, bodies["fr"])
-            mail.send(Message(subject=subject_cli, recipients=[email], body=body_cli))
+            outbox = [Message(subject=subject_cli, recipients=[email], body=body_cli)]
 
             notify_to = ADMIN_NOTIFY_EMAIL or app.config["MAIL_DEFAULT_SENDER"] or app.config["MAIL_USERNAME"]
             if notify_to:
@@ -812,19 +1089,24 @@ Paiement PayPal (capture): {capture_id or '—'}
 Message:
 {message or '—'}
 """
-                mail.send(Message(subject=subject_admin, recipients=[notify_to], body=body_admin))
+                outbox.append(Message(subject=subject_admin, recipients=[notify_to], body=body_admin))
+
+            # une seule session SMTP (connect + STARTTLS + AUTH) pour les deux mails
+            with mail.connect() as conn:
+                for msg in outbox:
+                    conn.send(msg)
         else:
             app.logger.warning("Mail non configuré: aucune confirmation envoyée. Configure MAIL_* env vars.")
     except Exception as e:
         app.logger.error("reservation_mail_error: %s", e)
 
     flash(_("Merci ! Votre réservation a bien été prise en compte. Un email de confirmation vous a été envoyé."), "success")
-    return render_template("reservation.html", tour=tour)
+    return render_template(_RES_TMPL, tour=tour)
 
 # URL propre : /reservation/<slug>
 @app.route("/reservation/<slug>", methods=["GET"])
 def reservation_clean(slug):
-    return render_template("reservation.html", tour=slug, slug=slug)
+    return render_template(_RES_TMPL, tour=slug, slug=slug)
 # ------------------------------------------------------------------
 # Formulaire : ajout d’un commentaire
 # ------------------------------------------------------------------
@@ -846,10 +1128,10 @@ def submit_comment():
             message=message,
             rating=float(rating),
             country=country,
-            date_str=datetime.utcnow().strftime("%Y-%m-%d"),
         )
         db.session.add(r)
         db.session.commit()
+        _invalidate_comments()
         flash(_("Merci pour votre commentaire !"), "success")
     except Exception as e:
         app.logger.error("submit_comment_error: %s", e)
@@ -861,21 +1143,10 @@ def submit_comment():
 # ------------------------------------------------------------------
 # Statique & SEO
 # ------------------------------------------------------------------
-@app.route('/robots.txt')
-def robots_txt():
-    resp = make_response(send_from_directory(app.static_folder, 'robots.txt', mimetype='text/plain'))
-    resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
-    return resp
-
-@app.get("/sitemap.xml")
-def sitemap_xml():
-    resp = make_response(send_from_directory(app.static_folder, "sitemap.xml", mimetype="application/xml"))
-    resp.headers["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0"
-    return resp
-
 @app.get("/healthz")
 def healthz():
-    return {"status": "ok"}, 200
+    # normalement servi par _fast_paths ; même corps précalculé si on passe par Flask
+    return Response(_HEALTHZ_BODY, status=200, mimetype="application/json")
 
 @app.errorhandler(404)
 def not_found(e):
@@ -902,36 +1173,56 @@ PAYPAL_CLIENT_SECRET = os.getenv("PAYPAL_CLIENT_SECRET") or os.getenv("PAYPAL_SE
 PAYPAL_CURRENCY = os.getenv("PAYPAL_CURRENCY", "USD").upper()
 PAYPAL_API_BASE = "https://api-m.sandbox.paypal.com" if PAYPAL_MODE == "sandbox" else "https://api-m.paypal.com"
 
-PRICES_USD_PAYPAL = {
-    "monserrate": [(1, 1, Decimal("65")), (2, 6, Decimal("55"))],
-    "zipaquira":  [(1, 1, Decimal("130")), (2, 2, Decimal("125")), (3, 5, Decimal("115"))],
-    "finca-cafe": [(1, 1, Decimal("140")), (2, 5, Decimal("120"))],
-    "chorrera":   [(1, 1, Decimal("125")), (2, 3, Decimal("115")), (4, 5, Decimal("105"))],
-    "candelaria": [(1, 1, Decimal("40")),  (2, 3, Decimal("35")),  (4, 6, Decimal("33"))],
-}
+# lecture seule : _compute_price_cached mémoïse sur cette grille
+PRICES_USD_PAYPAL = MappingProxyType({
+    "monserrate": ((1, 1, Decimal("65")), (2, 6, Decimal("55"))),
+    "zipaquira":  ((1, 1, Decimal("130")), (2, 2, Decimal("125")), (3, 5, Decimal("115"))),
+    "finca-cafe": ((1, 1, Decimal("140")), (2, 5, Decimal("120"))),
+    "chorrera":   ((1, 1, Decimal("125")), (2, 3, Decimal("115")), (4, 5, Decimal("105"))),
+    "candelaria": ((1, 1, Decimal("40")),  (2, 3, Decimal("35")),  (4, 6, Decimal("33"))),
+})
 COP_PER_UNIT = Decimal(os.getenv("COP_PER_UNIT", "3800"))
 HTTP_TIMEOUT = 60
+# Session HTTP partagée : keep-alive + pool dimensionné pour api-m.paypal.com
+# (Retry par défaut ne rejoue pas les POST → pas de double capture ;
+#  raise_on_status=False : après les essais, la réponse 5xx est rendue à l'appelant
+#  qui garde sa gestion status_code >= 400, au lieu d'une RetryError)
+_RETRY = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False)
+_SESSION = requests.Session()
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "64"))  # ≥ threads gunicorn par worker
+_SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=HTTP_POOL_MAXSIZE,
+                                       max_retries=_RETRY, pool_block=False))
+
+def prewarm_paypal():
+    # ouvre une connexion TLS vers PayPal dans le pool (appelé après fork, best effort)
+    try:
+        _SESSION.head(PAYPAL_API_BASE, timeout=5).close()
+    except requests.RequestException:
+        pass
+# jeton signé (HMAC) renvoyé après capture serveur → évite de re-vérifier chez PayPal.
+# Uniquement avec une clé explicitement configurée : jamais avec le repli public "dev-secret"
+# (sinon n'importe qui pourrait forger un jeton « COMPLETED » et réserver sans payer)
+_CAPTURE_KEY = os.getenv("CAPTURE_SIGNING_KEY") or os.getenv("SECRET_KEY")
+_CAPTURE_SIGNER = (URLSafeTimedSerializer(_CAPTURE_KEY, salt="paypal-capture")
+                   if _CAPTURE_KEY and _CAPTURE_KEY != "dev-secret" else None)
+CAPTURE_TOKEN_MAX_AGE = 900
 
 def _money2(q: Decimal) -> str:
     return str(q.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
 
-def compute_price(tour: str, persons: int):
-    key = (tour or "").strip().lower()
-    if key not in PRICES_USD_PAYPAL:
-        raise ValueError("Tour non tarifé")
-    try:
-        n = int(persons)
-    except Exception:
-        n = 1
-    n = max(1, min(n, 6))
+_DECIMAL_N = tuple(Decimal(n) for n in range(7))  # index = nombre de personnes (1..6)
+
+# 5 tours × 6 tailles de groupe, devise/taux fixés au démarrage → résultat déterministe
+@lru_cache(maxsize=64)
+def _compute_price_cached(key: str, n: int):
     per_person_usd = None
     for (mn, mx, price) in PRICES_USD_PAYPAL[key]:
         if mn <= n <= mx:
-            per_person_usd = Decimal(price)
+            per_person_usd = price
             break
     if per_person_usd is None:
         raise ValueError("Aucune règle de prix pour ce nombre de personnes")
-    total_usd = (per_person_usd * Decimal(n))
+    total_usd = (per_person_usd * _DECIMAL_N[n])
     if PAYPAL_CURRENCY == "USD":
         total_unit = total_usd
     elif PAYPAL_CURRENCY == "COP":
@@ -942,17 +1233,62 @@ def compute_price(tour: str, persons: int):
     desc = f"Reservation {key} x{n} — {per_person_usd} USD/pers"
     return amount, desc
 
+def compute_price(tour: str, persons: int):
+    key = (tour or "").strip().lower()
+    if key not in PRICES_USD_PAYPAL:
+        raise ValueError("Tour non tarifé")
+    try:
+        n = int(persons)
+    except Exception:
+        n = 1
+    n = max(1, min(n, 6))
+    return _compute_price_cached(key, n)
+
+# Jeton OAuth PayPal mis en cache (~9 h de validité) ; renouvelé 60 s avant expiration
+_TOKEN_CACHE = {"value": None, "exp": 0.0}
+_TOKEN_LOCK = threading.Lock()
+_TOKEN_MARGIN = 60
+# identifiants immuables pour la vie du process → en-têtes / corps précalculés
+_PAYPAL_BASIC = ("Basic " + b64encode(f"{PAYPAL_CLIENT_ID}:{PAYPAL_CLIENT_SECRET}".encode()).decode()
+                 if PAYPAL_CLIENT_ID and PAYPAL_CLIENT_SECRET else None)
+_PAYPAL_TOKEN_URL = f"{PAYPAL_API_BASE}/v1/oauth2/token"
+_PAYPAL_TOKEN_HEADERS = {"Accept": "application/json", "Accept-Language": "en_US", "Authorization": _PAYPAL_BASIC or ""}
+_PAYPAL_TOKEN_DATA = {"grant_type": "client_credentials"}
+
+# Appels PayPal : stream=True + `with` → la connexion retourne au pool dès le corps lu.
+# Un 401 signifie que le jeton en cache a été révoqué : on l'oublie pour le prochain appel.
+def _http_get(url: str, **kwargs):
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    kwargs.setdefault("stream", True)
+    r = _SESSION.get(url, **kwargs)
+    if r.status_code == 401:
+        _TOKEN_CACHE["value"] = None
+    return r
+
+def _http_post(url: str, **kwargs):
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    kwargs.setdefault("stream", True)
+    r = _SESSION.post(url, **kwargs)
+    if r.status_code == 401:
+        _TOKEN_CACHE["value"] = None
+    return r
+
 def paypal_access_token() -> str:
-    r = requests.post(
-        f"{PAYPAL_API_BASE}/v1/oauth2/token",
-        headers={"Accept": "application/json", "Accept-Language": "en_US"},
-        data={"grant_type": "client_credentials"},
-        auth=(PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET),
-        timeout=HTTP_TIMEOUT
-    )
-    r.raise_for_status()
-    js = r.json()
-    return js["access_token"]
+    if _TOKEN_CACHE["value"] and _TOKEN_CACHE["exp"] - time.monotonic() > _TOKEN_MARGIN:
+        return _TOKEN_CACHE["value"]
+    # identifiants absents : connu dès l'import, échec immédiat sans prendre le verrou
+    if not _PAYPAL_BASIC:
+        raise RuntimeError("PAYPAL_CLIENT_ID / PAYPAL_CLIENT_SECRET manquants")
+    with _TOKEN_LOCK:
+        now = time.monotonic()
+        if _TOKEN_CACHE["value"] and _TOKEN_CACHE["exp"] - now > _TOKEN_MARGIN:
+            return _TOKEN_CACHE["value"]
+        with _http_post(_PAYPAL_TOKEN_URL, headers=_PAYPAL_TOKEN_HEADERS, data=_PAYPAL_TOKEN_DATA) as r:
+            r.raise_for_status()
+            js = orjson.loads(r.content)
+        _TOKEN_CACHE["value"] = js["access_token"]
+        _TOKEN_CACHE["exp"] = now + int(js.get("expires_in", 3600))
+        return _TOKEN_CACHE["value"]
 
 @app.get("/paypal-config")
 def paypal_config():
@@ -982,19 +1318,20 @@ def create_paypal_order():
         }],
         "application_context": {"shipping_preference": "NO_SHIPPING","user_action": "PAY_NOW"}
     }
-    r = requests.post(
+    with _http_post(
         f"{PAYPAL_API_BASE}/v2/checkout/orders",
         headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-        json=payload, timeout=HTTP_TIMEOUT
-    )
-    if r.status_code >= 400:
+        json=payload
+    ) as r:
+        status_code, body = r.status_code, r.content
+    if status_code >= 400:
         try:
-            err = r.json()
+            err = orjson.loads(body)
         except Exception:
-            err = {"error": r.text}
+            err = {"error": body.decode("utf-8", "replace")}
         app.logger.error("paypal_create_error: %s", err)
         return {"error": err}, 400
-    order = r.json()
+    order = orjson.loads(body)
     oid = order.get("id")
     if not oid:
         app.logger.error("paypal_create_no_id: %s", order)
@@ -1004,12 +1341,12 @@ def create_paypal_order():
 @app.get("/paypal-order/<order_id>")
 def paypal_order(order_id):
     token = paypal_access_token()
-    r = requests.get(
+    with _http_get(
         f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}",
-        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-        timeout=HTTP_TIMEOUT
-    )
-    data = r.json() if r.content else {}
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    ) as r:
+        status_code, body = r.status_code, r.content
+    data = orjson.loads(body) if body else {}
     try:
         payee_mid = data["purchase_units"][0]["payee"].get("merchant_id")
     except Exception:
@@ -1021,71 +1358,129 @@ def paypal_order(order_id):
             "server_client_id_last6": PAYPAL_CLIENT_ID[-6:] if PAYPAL_CLIENT_ID else None
         },
         "raw": data
-    }, r.status_code
+    }, status_code
+
+def _paypal_read_order(order_id: str, token: str) -> dict:
+    with _http_get(
+        f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}",
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    ) as r:
+        body = r.content
+    return orjson.loads(body) if body else {}
 
 @app.post("/capture-paypal-order/<order_id>")
 def capture_paypal_order(order_id):
+    # capture directe : la lecture préalable de la commande ne sert qu'au diagnostic d'erreur
     token = paypal_access_token()
     pre = {}
-    try:
-        r0 = requests.get(
-            f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}",
-            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-            timeout=HTTP_TIMEOUT
-        )
-        j0 = r0.json() if r0.content else {}
-        pre["pre_status"] = j0.get("status")
+    # PayPal-Request-Id déterministe : un rejeu (double clic, retry navigateur) renvoie
+    # la capture déjà faite au lieu de refaire le travail côté PayPal
+    with _http_post(
+        f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}/capture",
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json",
+                 "PayPal-Request-Id": f"cap-{order_id}"}
+    ) as r:
+        status_code, body = r.status_code, r.content
+    if status_code >= 400:
         try:
-            pre["payee_merchant_id"] = j0["purchase_units"][0]["payee"].get("merchant_id")
+            err = orjson.loads(body)
         except Exception:
-            pre["payee_merchant_id"] = None
-    except Exception as e:
-        app.logger.warning("paypal_pre_read_failed: %s", e)
-
-    r = requests.post(
-        f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}/capture",
-        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-        timeout=HTTP_TIMEOUT
-    )
-    if r.status_code >= 400:
+            err = {"error": body.decode("utf-8", "replace")}
         try:
-            err = r.json()
+            issue = err["details"][0]["issue"]
         except Exception:
-            err = {"error": r.text}
-        app.logger.error("paypal_capture_error: %s", err)
-        return {
-            "error": "CAPTURE_FAILED",
-            "reason": err,
-            "hint": {
-                "mode": PAYPAL_MODE,
-                "server_client_id_last6": PAYPAL_CLIENT_ID[-6:] if PAYPAL_CLIENT_ID else None,
-                "order_payee_merchant_id": pre.get("payee_merchant_id"),
-                "explain": "Si merchant_id ≠ ton compte, ou si client_id_last6 ≠ celui chargé côté front, PayPal renvoie 403 PERMISSION_DENIED."
-            }
-        }, 400
+            issue = None
+        if status_code == 404:
+            app.logger.error("paypal_capture_not_found: %s", err)
+            return {"error": "ORDER_NOT_FOUND", "reason": err}, 400
+        if not (status_code == 422 and issue == "ORDER_ALREADY_CAPTURED"):
+            try:
+                j0 = _paypal_read_order(order_id, token)
+                pre["pre_status"] = j0.get("status")
+                try:
+                    pre["payee_merchant_id"] = j0["purchase_units"][0]["payee"].get("merchant_id")
+                except Exception:
+                    pre["payee_merchant_id"] = None
+            except Exception as e:
+                app.logger.warning("paypal_pre_read_failed: %s", e)
+            app.logger.error("paypal_capture_error: %s", err)
+            return {
+                "error": "CAPTURE_FAILED",
+                "reason": err,
+                "hint": {
+                    "mode": PAYPAL_MODE,
+                    "server_client_id_last6": PAYPAL_CLIENT_ID[-6:] if PAYPAL_CLIENT_ID else None,
+                    "order_payee_merchant_id": pre.get("payee_merchant_id"),
+                    "explain": "Si merchant_id ≠ ton compte, ou si client_id_last6 ≠ celui chargé côté front, PayPal renvoie 403 PERMISSION_DENIED."
+                }
+            }, 400
+        # déjà capturée (double clic, retry navigateur) : on relit la commande pour l'id de capture
+        data = _paypal_read_order(order_id, token)
+    else:
+        data = orjson.loads(body) if body else {}
 
-    data = r.json() if r.content else {}
     status = data.get("status", "UNKNOWN")
     cap_id = None
     try:
         cap_id = data["purchase_units"][0]["payments"]["captures"][0]["id"]
     except Exception:
         cap_id = data.get("id")
-    return {"id": cap_id, "status": status, "pre": pre, "raw": data}
+    capture_token = (_CAPTURE_SIGNER.dumps({"id": cap_id, "status": status})
+                     if (_CAPTURE_SIGNER and cap_id and status == "COMPLETED") else None)
+    return {"id": cap_id, "status": status, "token": capture_token, "pre": pre, "raw": data}
+
+def _capture_token_ok(token: str, capture_id: str) -> bool:
+    # pas de clé dédiée → toujours vérifier chez PayPal
+    if not _CAPTURE_SIGNER or not token or not capture_id:
+        return False
+    try:
+        data = _CAPTURE_SIGNER.loads(token, max_age=CAPTURE_TOKEN_MAX_AGE)
+    except BadSignature:
+        return False
+    return data.get("id") == capture_id and data.get("status") == "COMPLETED"
 
 def verify_paypal_capture(capture_id: str) -> bool:
     if not capture_id:
         return False
-    token = paypal_access_token()
-    r = requests.get(
-        f"{PAYPAL_API_BASE}/v2/payments/captures/{capture_id}",
-        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-        timeout=HTTP_TIMEOUT
-    )
-    if r.status_code >= 400:
-        app.logger.error("paypal_verify_error: %s", r.text)
+    try:
+        token = paypal_access_token()
+        with _http_get(
+            f"{PAYPAL_API_BASE}/v2/payments/captures/{capture_id}",
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        ) as r:
+            status_code, body = r.status_code, r.content
+    except requests.RequestException as e:
+        # PayPal injoignable : message « paiement non confirmé » plutôt qu'une page 500
+        app.logger.error("paypal_verify_unreachable: %s", e)
+        return False
+    if status_code >= 400:
+        app.logger.error("paypal_verify_error: %s", body.decode("utf-8", "replace"))
         return False
-    return (r.json().get("status") == "COMPLETED")
+    # chemin rapide : PayPal renvoie du JSON compact, pas besoin de parser sur succès
+    if b'"status":"COMPLETED"' in body:
+        return True
+    return (orjson.loads(body).get("status") == "COMPLETED")
+
+# ------------------------------------------------------------------
+# Pages statiques : HTML rendu mis en cache par (template, langue, hôte)
+# ------------------------------------------------------------------
+# Seule la langue fait varier ces pages (pas de flash, pas de session).
+# Une query autre que ?lang= (utm_…) est recopiée dans les liens → pas de cache.
+# L'hôte (en-tête Host, fourni par le client) entre dans les URL absolues : seul l'hôte
+# canonique est mis en cache, sinon des Host: arbitraires rempliraient le cache pour de bon.
+_PAGE_CACHE = {}
+_PAGE_CACHE_MAX = 64
+
+def _render_cached(name: str):
+    if request.host != APP_CANONICAL_HOST or any(k != "lang" for k in request.args):
+        return render_template(name)
+    key = (name, get_locale(), request.host_url)
+    html = _PAGE_CACHE.get(key)
+    if html is None:
+        html = render_template(name).encode()
+        if len(_PAGE_CACHE) < _PAGE_CACHE_MAX:
+            _PAGE_CACHE[key] = html
+    return Response(html, mimetype="text/html")
 
 # ------------------------------------------------------------------
 # ALIAS D’ENDPOINTS
@@ -1093,12 +1488,12 @@ def verify_paypal_capture(capture_id: str) -> bool:
 if "tours" not in app.view_functions:
     @app.route("/tours", endpoint="tours", methods=["GET"])
     def __tours_alias():
-        return render_template("tours.html")
+        return _render_cached("tours.html")
 
 if "transport" not in app.view_functions:
     @app.route("/transport", endpoint="transport", methods=["GET"])
     def __transport_alias():
-        return render_template("transport.html")
+        return _render_cached("transport.html")
 
 # ------------------------------------------------------------------
 # Entrée
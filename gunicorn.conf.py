@@ -0,0 +1,38 @@
+# ------------------------------------------------------------------
+# Gunicorn (Render) — lu automatiquement par `gunicorn app:app`
+# ------------------------------------------------------------------
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+# défaut fixe et petit : os.cpu_count() lit les cœurs de l'hôte, pas le quota du conteneur.
+# Chaque worker a son propre pool SQLAlchemy → workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# doit rester sous max_connections de Postgres (ex. 2 × (10 + 20) = 60)
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# keep-alive aligné sur le timeout d'inactivité du load balancer
+keepalive = 75
+
+# recyclage des workers (fuites mémoire éventuelles), étalé pour éviter les redémarrages groupés
+max_requests = 2000
+max_requests_jitter = 200
+
+# import du module une seule fois dans le master → caches (templates, prix, pages) partagés en CoW
+preload_app = True
+
+
+def on_starting(server):
+    # tables + auto-migrate une seule fois, dans le master, avant le fork des workers
+    from app import init_db
+    init_db()
+
+
+def post_fork(server, worker):
+    # les connexions BDD ouvertes au chargement (create_all / auto-migrate)
+    # ne doivent pas être partagées entre processus
+    from app import app, db, prewarm_paypal
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # handshake TLS vers PayPal fait ici plutôt qu'au premier paiement
+    prewarm_paypal()